@@ -7,7 +7,11 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for
 from islamic_content import IslamicContentFetcher
 from whatsapp_poster import WhatsAppPoster
 from scheduler import IslamicScheduler
-from config import *
+from message_templates import MessageTemplates
+from settings_store import SettingsStore
+from pacing import PacingController
+from cluster import ClusterNode, SQLiteLeaseStore
+import config
 import logging
 from datetime import datetime
 import json
@@ -27,9 +31,36 @@ logging.basicConfig(
 )
 
 # Initialize components
-content_fetcher = IslamicContentFetcher()
-whatsapp_poster = WhatsAppPoster()
-scheduler = IslamicScheduler(content_fetcher, whatsapp_poster)
+settings_store = SettingsStore(config.SETTINGS_FILE, defaults={
+    'groups': config.WHATSAPP_GROUPS,
+    'channels': config.WHATSAPP_CHANNELS,
+    'posting_times': config.POSTING_TIMES
+})
+content_fetcher = IslamicContentFetcher(templates=MessageTemplates(
+    default_language=config.DEFAULT_LANGUAGE,
+    target_languages=config.TARGET_LANGUAGES
+))
+whatsapp_poster = WhatsAppPoster(
+    wait_time=config.WAIT_TIME,
+    pacer=PacingController(
+        initial_delay=config.DELAY_BETWEEN_POSTS,
+        min_delay=config.PACING_MIN_DELAY,
+        max_delay=config.PACING_MAX_DELAY
+    )
+)
+cluster = None
+if config.CLUSTER_ENABLED:
+    cluster = ClusterNode(
+        SQLiteLeaseStore(config.CLUSTER_STORE_PATH),
+        node_id=config.CLUSTER_NODE_ID,
+        lease_seconds=config.CLUSTER_LEASE_SECONDS,
+        heartbeat_seconds=config.CLUSTER_HEARTBEAT_SECONDS
+    )
+scheduler = IslamicScheduler(
+    content_fetcher, whatsapp_poster,
+    settings_store=settings_store,
+    cluster=cluster
+)
 
 # Store posting history
 POST_HISTORY_FILE = 'post_history.json'
@@ -54,20 +85,21 @@ def save_history(entry):
 def index():
     """Main dashboard page"""
     history = load_history()
+    settings = settings_store.current()
     stats = {
         'total_posts': len(history),
         'today_posts': len([h for h in history if h.get('date', '').startswith(datetime.now().strftime('%Y-%m-%d'))]),
-        'total_groups': len(WHATSAPP_GROUPS) + len(WHATSAPP_CHANNELS),
+        'total_groups': len(settings['groups']) + len(settings['channels']),
         'scheduler_status': 'Active' if scheduler.is_running else 'Stopped'
     }
     return render_template('index.html', 
                          history=history[:10],  # Show last 10
                          stats=stats,
                          config={
-                             'daily_posts': POSTS_PER_DAY,
-                             'posting_times': POSTING_TIMES,
-                             'groups': WHATSAPP_GROUPS,
-                             'channels': WHATSAPP_CHANNELS
+                             'daily_posts': config.POSTS_PER_DAY,
+                             'posting_times': settings['posting_times'],
+                             'groups': settings['groups'],
+                             'channels': settings['channels']
                          })
 
 @app.route('/api/fetch-content/<content_type>')
@@ -113,17 +145,20 @@ def post_now():
         else:
             return jsonify({'error': 'Invalid content type'}), 400
         
-        message = content_fetcher.format_for_whatsapp(content)
+        settings = settings_store.current()
+        messages = content_fetcher.templates.render_many(
+            [content], settings['groups'] + settings['channels']
+        )[0]
         
         # Post to groups
         results = []
-        for group_id in WHATSAPP_GROUPS:
-            success = whatsapp_poster.send_to_group(group_id, message)
+        for group_id in settings['groups']:
+            success = whatsapp_poster.send_to_group(group_id, messages[group_id])
             results.append({'group_id': group_id, 'success': success})
         
         # Post to channels
-        for channel_id in WHATSAPP_CHANNELS:
-            success = whatsapp_poster.send_to_channel(channel_id, message)
+        for channel_id in settings['channels']:
+            success = whatsapp_poster.send_to_channel(channel_id, messages[channel_id])
             results.append({'channel_id': channel_id, 'success': success})
         
         # Save to history
@@ -168,9 +203,15 @@ def scheduler_status():
     """Get scheduler status"""
     return jsonify({
         'running': scheduler.is_running,
-        'next_run': scheduler.get_next_run_time()
+        'next_run': scheduler.get_next_run_time(),
+        'cluster': cluster.get_status() if cluster else None
     })
 
+@app.route('/api/pacing')
+def pacing_status():
+    """Get send pacing state and recent decisions"""
+    return jsonify(whatsapp_poster.pacer.get_status())
+
 @app.route('/api/history')
 def get_history():
     """Get full posting history"""
@@ -182,8 +223,9 @@ def test_whatsapp():
     """Test WhatsApp connection"""
     try:
         test_message = "🧪 Test message from Islamic Automation System\n\nConnection successful! ✅"
-        if WHATSAPP_GROUPS:
-            result = whatsapp_poster.send_to_group(WHATSAPP_GROUPS[0], test_message)
+        groups = settings_store.current()['groups']
+        if groups:
+            result = whatsapp_poster.send_to_group(groups[0], test_message)
             return jsonify({
                 'success': result,
                 'message': 'Test message sent to first group'
@@ -196,16 +238,25 @@ def test_whatsapp():
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
     """Settings page"""
+    error = None
     if request.method == 'POST':
-        # Handle settings update
-        # This would update config.py or a separate settings file
-        return redirect(url_for('index'))
+        # Saved settings are picked up by the running scheduler without a restart
+        try:
+            settings_store.update(
+                groups=request.form.get('groups', '').splitlines(),
+                channels=request.form.get('channels', '').splitlines(),
+                posting_times=request.form.get('posting_times', '').splitlines()
+            )
+            return redirect(url_for('index'))
+        except ValueError as e:
+            error = str(e)
     
-    return render_template('settings.html', config={
-        'groups': WHATSAPP_GROUPS,
-        'channels': WHATSAPP_CHANNELS,
-        'posting_times': POSTING_TIMES,
-        'posts_per_day': POSTS_PER_DAY
+    current = settings_store.current()
+    return render_template('settings.html', error=error, config={
+        'groups': current['groups'],
+        'channels': current['channels'],
+        'posting_times': current['posting_times'],
+        'posts_per_day': config.POSTS_PER_DAY
     })
 
 if __name__ == '__main__':
@@ -213,10 +264,11 @@ if __name__ == '__main__':
     print("🕌 Islamic WhatsApp Automation System")
     print("="*50)
     print(f"\n📱 Dashboard: http://localhost:5000")
-    print(f"📊 Configured Groups: {len(WHATSAPP_GROUPS)}")
-    print(f"📢 Configured Channels: {len(WHATSAPP_CHANNELS)}")
-    print(f"📅 Daily Posts: {POSTS_PER_DAY}")
-    print(f"⏰ Posting Times: {POSTING_TIMES}")
+    current = settings_store.current()
+    print(f"📊 Configured Groups: {len(current['groups'])}")
+    print(f"📢 Configured Channels: {len(current['channels'])}")
+    print(f"📅 Daily Posts: {config.POSTS_PER_DAY}")
+    print(f"⏰ Posting Times: {current['posting_times']}")
     print("\n" + "="*50)
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,472 @@
+"""Multi-Node Cluster Mode
+
+Lets several dashboard/scheduler replicas share the posting work:
+
+- Nodes heartbeat into a shared lease store; one holds the leader lease.
+- Targets are spread over live nodes with a consistent hash ring, so a
+  node joining or leaving only moves its own share of targets.
+- Every (slot, target) pair is claimed in the store right before it is
+  sent, so a slot is executed once across the cluster even if two nodes
+  fire it. The result of each send is recorded right after it.
+- The first node to register a slot chooses its content, so every node
+  posts the same content for that slot.
+- The leader takes over targets that were never claimed, or whose node
+  died before recording the send. Failed sends are recorded and not
+  retried, as on a single node.
+
+A target can still be posted twice if its node dies (or misses heartbeats
+for a whole lease) while sending it, or cannot record the send and dies
+later. A node stops claiming targets once its own lease has lapsed.
+
+SQLiteLeaseStore is for nodes on a single host. It uses WAL mode, which
+does not work on network filesystems, so do not put the file on a shared
+volume. For nodes on several hosts, implement LeaseStore on top of a shared
+database.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS nodes (
+        node_id TEXT PRIMARY KEY,
+        expires REAL NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires REAL NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS slots (
+        slot TEXT PRIMARY KEY,
+        targets TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created REAL NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS claims (
+        slot TEXT NOT NULL,
+        target TEXT NOT NULL,
+        node_id TEXT NOT NULL,
+        claimed REAL NOT NULL,
+        status TEXT NOT NULL DEFAULT 'claimed',
+        PRIMARY KEY (slot, target)
+    )''',
+)
+
+
+class LeaseStore:
+    """Shared state used for membership, leases and slot claims"""
+
+    def heartbeat(self, node_id, ttl):
+        """Mark a node alive for ttl seconds"""
+        raise NotImplementedError
+
+    def leave(self, node_id):
+        """Remove a node from the cluster"""
+        raise NotImplementedError
+
+    def live_nodes(self):
+        """Sorted ids of nodes with an unexpired heartbeat"""
+        raise NotImplementedError
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or renew a named lease, returning True if owner holds it"""
+        raise NotImplementedError
+
+    def release_lease(self, name, owner):
+        """Give up a lease held by owner"""
+        raise NotImplementedError
+
+    def slot_content(self, slot):
+        """Content registered for a slot, or None"""
+        raise NotImplementedError
+
+    def register_slot(self, slot, targets, content):
+        """Record the targets and content of a slot, returning the stored content
+
+        The first registration wins.
+        """
+        raise NotImplementedError
+
+    def claim(self, slot, targets, node_id):
+        """Claim (slot, target) pairs, returning the targets this node won"""
+        raise NotImplementedError
+
+    def finish(self, slot, target, node_id, sent):
+        """Record a claimed target as 'sent' or 'failed' (only if node_id holds it)"""
+        raise NotImplementedError
+
+    def orphaned(self, older_than, newer_than, live_nodes):
+        """[(slot, content, targets)] for targets not sent by a live node
+
+        Covers unclaimed targets and unfinished claims held by nodes that
+        are not in live_nodes.
+        """
+        raise NotImplementedError
+
+    def reclaim(self, slot, targets, node_id, live_nodes):
+        """Claim unclaimed targets and take over unfinished claims of dead nodes"""
+        raise NotImplementedError
+
+    def prune(self, before):
+        """Delete slots and claims registered before a timestamp"""
+        raise NotImplementedError
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Lease store in a SQLite file shared by all nodes"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+
+    def _connect(self):
+        """New connection; writes take the database lock up front"""
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        return _Transaction(db)
+
+    def heartbeat(self, node_id, ttl):
+        with self._connect() as db:
+            db.execute(
+                'INSERT INTO nodes (node_id, expires) VALUES (?, ?) '
+                'ON CONFLICT(node_id) DO UPDATE SET expires = excluded.expires',
+                (node_id, time.time() + ttl)
+            )
+
+    def leave(self, node_id):
+        with self._connect() as db:
+            db.execute('DELETE FROM nodes WHERE node_id = ?', (node_id,))
+
+    def live_nodes(self):
+        with self._connect() as db:
+            rows = db.execute(
+                'SELECT node_id FROM nodes WHERE expires > ? ORDER BY node_id', (time.time(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def acquire_lease(self, name, owner, ttl):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute('SELECT owner, expires FROM leases WHERE name = ?', (name,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            db.execute(
+                'INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires',
+                (name, owner, now + ttl)
+            )
+            return True
+
+    def release_lease(self, name, owner):
+        with self._connect() as db:
+            db.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+
+    def slot_content(self, slot):
+        with self._connect() as db:
+            row = db.execute('SELECT content FROM slots WHERE slot = ?', (slot,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def register_slot(self, slot, targets, content):
+        with self._connect() as db:
+            db.execute(
+                'INSERT OR IGNORE INTO slots (slot, targets, content, created) VALUES (?, ?, ?, ?)',
+                (slot, json.dumps(list(targets)), json.dumps(content, ensure_ascii=False), time.time())
+            )
+            row = db.execute('SELECT content FROM slots WHERE slot = ?', (slot,)).fetchone()
+        return json.loads(row[0])
+
+    def claim(self, slot, targets, node_id):
+        won = []
+        now = time.time()
+        with self._connect() as db:
+            for target in targets:
+                cursor = db.execute(
+                    'INSERT OR IGNORE INTO claims (slot, target, node_id, claimed) VALUES (?, ?, ?, ?)',
+                    (slot, target, node_id, now)
+                )
+                if cursor.rowcount == 1:
+                    won.append(target)
+        return won
+
+    def finish(self, slot, target, node_id, sent):
+        with self._connect() as db:
+            db.execute(
+                'UPDATE claims SET status = ? WHERE slot = ? AND target = ? AND node_id = ?',
+                ('sent' if sent else 'failed', slot, target, node_id)
+            )
+
+    def orphaned(self, older_than, newer_than, live_nodes):
+        live_nodes = set(live_nodes)
+        with self._connect() as db:
+            slots = db.execute(
+                'SELECT slot, targets, content FROM slots WHERE created < ? AND created > ?',
+                (older_than, newer_than)
+            ).fetchall()
+            result = []
+            for slot, targets, content in slots:
+                claims = {
+                    target: (node_id, status)
+                    for target, node_id, status in db.execute(
+                        'SELECT target, node_id, status FROM claims WHERE slot = ?', (slot,)
+                    )
+                }
+                missing = [
+                    target for target in json.loads(targets)
+                    if target not in claims
+                    or (claims[target][1] == 'claimed' and claims[target][0] not in live_nodes)
+                ]
+                if missing:
+                    result.append((slot, json.loads(content), missing))
+        return result
+
+    def reclaim(self, slot, targets, node_id, live_nodes):
+        won = []
+        now = time.time()
+        live_nodes = list(live_nodes)
+        placeholders = ', '.join('?' * len(live_nodes))
+        with self._connect() as db:
+            for target in targets:
+                cursor = db.execute(
+                    'INSERT OR IGNORE INTO claims (slot, target, node_id, claimed) VALUES (?, ?, ?, ?)',
+                    (slot, target, node_id, now)
+                )
+                if cursor.rowcount == 0:
+                    cursor = db.execute(
+                        'UPDATE claims SET node_id = ?, claimed = ? '
+                        "WHERE slot = ? AND target = ? AND status = 'claimed' "
+                        f'AND node_id NOT IN ({placeholders})',
+                        (node_id, now, slot, target, *live_nodes)
+                    )
+                if cursor.rowcount == 1:
+                    won.append(target)
+        return won
+
+    def prune(self, before):
+        with self._connect() as db:
+            db.execute('DELETE FROM claims WHERE slot IN (SELECT slot FROM slots WHERE created < ?)', (before,))
+            db.execute('DELETE FROM slots WHERE created < ?', (before,))
+            db.execute('DELETE FROM nodes WHERE expires < ?', (before,))
+
+
+class _Transaction:
+    """Context manager running a connection's statements in one write transaction"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.db.close()
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, nodes, replicas=100):
+        self.nodes = sorted(nodes)
+        self._ring = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(replicas)
+        )
+        self._keys = [key for key, _ in self._ring]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def owner(self, key):
+        """Node responsible for a key"""
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class ClusterNode:
+    """This process's membership in the posting cluster"""
+
+    LEADER_LEASE = 'leader'
+
+    def __init__(self, store, node_id=None, lease_seconds=30, heartbeat_seconds=10):
+        self.store = store
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.is_leader = False
+        self.ring = HashRing([self.node_id])
+        self._stop = threading.Event()
+        self.thread = None
+        # Targets being sent; leaving waits until they are recorded
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stopping = False
+        self._lease_expires = 0.0
+        logging.info(f"Cluster node initialized: {self.node_id}")
+
+    def start(self):
+        """Join the cluster and keep heartbeating in the background"""
+        with self._lock:
+            self._stopping = False
+        self._stop.clear()
+        self.heartbeat()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Leave the cluster, handing over leadership
+
+        If a target is being sent, the node keeps heartbeating and leaves
+        once that send is recorded, so no other node takes it over.
+        """
+        with self._lock:
+            self._stopping = True
+            leave_now = self._in_flight == 0
+        if leave_now:
+            self._leave()
+        else:
+            logging.info(f"Cluster node {self.node_id} will leave after the send in progress")
+
+    def _leave(self):
+        """Stop heartbeating and remove this node from the cluster"""
+        self._stop.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        self.store.leave(self.node_id)
+        if self.is_leader:
+            self.store.release_lease(self.LEADER_LEASE, self.node_id)
+            self.is_leader = False
+        logging.info(f"Cluster node left: {self.node_id}")
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logging.error(f"Cluster heartbeat failed: {str(e)}")
+
+    def heartbeat(self):
+        """Renew membership and leadership, rebalancing if nodes changed"""
+        started = time.monotonic()
+        self.store.heartbeat(self.node_id, self.lease_seconds)
+        self._lease_expires = started + self.lease_seconds
+
+        nodes = self.store.live_nodes()
+        if self.node_id not in nodes:
+            nodes = sorted(nodes + [self.node_id])
+        if nodes != self.ring.nodes:
+            logging.info(f"Cluster membership changed, rebalancing across: {', '.join(nodes)}")
+            self.ring = HashRing(nodes)
+
+        was_leader = self.is_leader
+        self.is_leader = self.store.acquire_lease(self.LEADER_LEASE, self.node_id, self.lease_seconds)
+        if self.is_leader and not was_leader:
+            logging.info(f"Node {self.node_id} is now cluster leader")
+            self.store.prune(time.time() - 7 * 24 * 3600)
+
+    def shard(self, targets):
+        """Targets this node is responsible for"""
+        ring = self.ring
+        return [target for target in targets if ring.owner(target) == self.node_id]
+
+    def open_slot(self, slot, targets, choose_content):
+        """Register a slot and return (content, this node's share of targets)
+
+        The first node to register the slot picks its content with
+        choose_content(). Targets are claimed one at a time with
+        claim_target, right before each is sent.
+        """
+        content = self.store.slot_content(slot)
+        if content is None:
+            content = self.store.register_slot(slot, targets, choose_content())
+        return content, self.shard(targets)
+
+    def _live_nodes(self):
+        """Live node ids, always including this node"""
+        live_nodes = self.store.live_nodes()
+        if self.node_id not in live_nodes:
+            live_nodes.append(self.node_id)
+        return live_nodes
+
+    def claim_target(self, slot, target, take_over=False):
+        """Claim one target of a slot right before sending it
+
+        With take_over, also takes the target from a dead node that did not
+        finish it. Returns False if another node holds it, this node is
+        leaving, or this node's own lease has lapsed. Every successful
+        claim must be followed by finish_target.
+        """
+        with self._lock:
+            if self._stopping:
+                return False
+            if time.monotonic() > self._lease_expires:
+                logging.warning(f"Cluster lease of {self.node_id} lapsed, not claiming {target}")
+                return False
+            self._in_flight += 1
+
+        won = []
+        try:
+            if take_over:
+                won = self.store.reclaim(slot, [target], self.node_id, self._live_nodes())
+            else:
+                won = self.store.claim(slot, [target], self.node_id)
+        finally:
+            if not won:
+                self._release()
+        return bool(won)
+
+    def finish_target(self, slot, target, sent):
+        """Record the result of a claimed target's send"""
+        try:
+            self.store.finish(slot, target, self.node_id, sent)
+        finally:
+            self._release()
+
+    def _release(self):
+        """End an in-flight send, leaving the cluster if stop() is waiting"""
+        with self._lock:
+            self._in_flight -= 1
+            leave_now = self._stopping and self._in_flight == 0
+        if leave_now:
+            self._leave()
+
+    def recover_orphans(self, grace_seconds=None, max_age_seconds=3600):
+        """Recent targets that no live node sent (leader only)
+
+        Returns [(slot, content, targets)] for targets nobody claimed and
+        for targets whose node died before recording the send. Send them
+        with claim_target(..., take_over=True).
+        """
+        if not self.is_leader:
+            return []
+        now = time.time()
+        grace_seconds = self.lease_seconds * 2 if grace_seconds is None else grace_seconds
+        orphans = self.store.orphaned(now - grace_seconds, now - max_age_seconds, self._live_nodes())
+        for slot, _, targets in orphans:
+            logging.warning(f"Recovering {len(targets)} unsent targets for slot {slot}")
+        return orphans
+
+    def get_status(self):
+        """Membership and leadership of this node"""
+        return {
+            'node_id': self.node_id,
+            'leader': self.is_leader,
+            'nodes': list(self.ring.nodes)
+        }
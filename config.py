@@ -44,6 +44,31 @@ POSTING_TIMES = [
     "22:00",  # Night
 ]
 
+# Post relative to real prayer times computed for each location
+PRAYER_SCHEDULING = False
+
+# Calculation method: "MWL", "ISNA", "Egypt", "Makkah" or "Karachi"
+PRAYER_CALCULATION_METHOD = "Karachi"
+
+# Asr method: "Standard" or "Hanafi"
+PRAYER_ASR_METHOD = "Hanafi"
+
+# Locations and the groups/channels that follow their prayer times
+PRAYER_LOCATIONS = [
+    # Example:
+    # {'name': 'Karachi', 'latitude': 24.8607, 'longitude': 67.0011,
+    #  'targets': ["1234567890-1234567890"]},
+]
+
+# Minutes after each prayer to post
+PRAYER_POST_OFFSETS = {
+    'fajr': 20,
+    'dhuhr': 15,
+    'asr': 15,
+    'maghrib': 10,
+    'isha': 20,
+}
+
 # ============================================
 # CONTENT DISTRIBUTION
 # ============================================
@@ -56,6 +81,17 @@ CONTENT_DISTRIBUTION = {
     'allah_names': 10 # 10% Names of Allah
 }
 
+# Chance of posting themed content when a calendar rule matches (0-1)
+TOPIC_BIAS = 0.6
+
+# Calendar rules for themed content, first match wins. None uses the
+# built-in rules (content_index.DEFAULT_TOPIC_RULES): last ten nights of
+# Ramadan, Ramadan, 1-13 Dhul Hijjah, then Fridays.
+# Custom rules look like: {'topic': 'fasting', 'hijri_month': 9}
+# Hijri months: 9 = Ramadan, 12 = Dhul Hijjah. Weekday: 4 = Friday
+# Topics: "fasting", "laylat-al-qadr", "jumuah", "hajj"
+TOPIC_RULES = None
+
 # ============================================
 # API CONFIGURATION (Optional)
 # ============================================
@@ -75,18 +111,65 @@ HADITH_API_KEY = "YOUR_HADITH_API_KEY"
 # Wait time before sending (seconds)
 WAIT_TIME = 15
 
-# Delay between multiple posts (seconds)
+# Starting delay between multiple posts (seconds). The delay backs off on
+# errors or rate limiting. It only shrinks below this value for API sends
+# confirmed by the server; browser sends never go faster than this.
 DELAY_BETWEEN_POSTS = 60
 
+# Limits for the adaptive delay (seconds)
+PACING_MIN_DELAY = 10
+PACING_MAX_DELAY = 600
+
 # Auto-close browser tab after posting
 CLOSE_TAB_AFTER_POST = True
 
+# Targets and posting times saved from the dashboard (overrides the lists above,
+# reloaded by the running scheduler without a restart)
+SETTINGS_FILE = "settings.json"
+
 # Enable logging
 ENABLE_LOGGING = True
 
 # Log file location
 LOG_FILE = "islamic_automation.log"
 
+# ============================================
+# IMAGE CARDS
+# ============================================
+
+# Card template ("classic" or "light") and size in pixels
+CARD_TEMPLATE = "classic"
+CARD_SIZE = (1080, 1080)
+
+# Rendered cards are cached here, keyed by content, template and size
+CARD_CACHE_DIR = "card_cache"
+
+# Font files for card rendering (not bundled, see README). Arabic text is
+# left off cards unless the Arabic font exists and Pillow has libraqm.
+CARD_FONTS = {
+    'arabic': "fonts/Amiri-Regular.ttf",
+    'latin': "fonts/DejaVuSans.ttf",
+}
+
+# ============================================
+# CLUSTER MODE (multiple dashboard replicas)
+# ============================================
+
+# Share posting across nodes on one host; each slot is claimed once per target
+# cluster-wide. All nodes must use the same CLUSTER_STORE_PATH and SETTINGS_FILE.
+CLUSTER_ENABLED = False
+
+# Unique name of this node (default: hostname-pid)
+CLUSTER_NODE_ID = None
+
+# Shared SQLite file for membership, leader lease and slot claims. Keep it on
+# a local disk: SQLite's WAL mode does not work on network filesystems.
+CLUSTER_STORE_PATH = "cluster.db"
+
+# A node is considered gone after this many seconds without a heartbeat
+CLUSTER_LEASE_SECONDS = 30
+CLUSTER_HEARTBEAT_SECONDS = 10
+
 # ============================================
 # LANGUAGE SETTINGS
 # ============================================
@@ -98,6 +181,14 @@ QURAN_TRANSLATION = "en.asad"  # English - Muhammad Asad
 # "en.yusufali" - Yusuf Ali
 # "ur.jalandhry" - Urdu - Fateh Muhammad Jalandhry
 
+# Message language for posts: "en" (English) or "ur" (Urdu)
+DEFAULT_LANGUAGE = "en"
+
+# Per-target message language, overrides DEFAULT_LANGUAGE
+TARGET_LANGUAGES = {
+    # Example: "1234567890-1234567890": "ur",
+}
+
 # Include Arabic text
 INCLUDE_ARABIC = True
 
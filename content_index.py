@@ -0,0 +1,227 @@
+"""Topic Index for Islamic Content
+
+Local inverted index over ayah translations, hadith texts and duas, with
+keyword and tag queries, plus calendar rules (Ramadan, Jumu'ah, Hajj season)
+that pick a topic for the current day.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import time
+from datetime import date
+
+from static_content import load_static_content
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+THEMED_CONTENT_FILE = os.path.join(DATA_DIR, 'themed_content.json')
+
+# Topic name -> tags and keywords that match it
+TOPICS = {
+    'fasting': {
+        'tags': ['fasting', 'ramadan'],
+        'keywords': ['fast', 'fasting', 'ramadan', 'suhur', 'iftar'],
+    },
+    'laylat-al-qadr': {
+        'tags': ['laylat-al-qadr'],
+        'keywords': ['decree', 'qadr'],
+    },
+    'jumuah': {
+        'tags': ['jumuah', 'friday'],
+        'keywords': ['friday', "jumu'ah"],
+    },
+    'hajj': {
+        'tags': ['hajj', 'umrah', 'arafah'],
+        'keywords': ['hajj', 'umrah', 'pilgrimage', 'arafah'],
+    },
+}
+
+# Calendar rules, first match wins. Hijri months: 9 = Ramadan, 12 = Dhul Hijjah
+DEFAULT_TOPIC_RULES = [
+    {'topic': 'laylat-al-qadr', 'hijri_month': 9, 'hijri_days': [21, 30]},
+    {'topic': 'fasting', 'hijri_month': 9},
+    {'topic': 'hajj', 'hijri_month': 12, 'hijri_days': [1, 13]},
+    {'topic': 'jumuah', 'weekday': 4},
+]
+
+_STOP_WORDS = frozenset(
+    'a an and are as at be by for from he his i in is it me my of on or so '
+    'that the their them they this to was we were who whom will with you your'.split()
+)
+_TOKEN_RE = re.compile(r"[a-z][a-z'\-]*")
+
+
+def _stem(word):
+    """Very light suffix stripping so 'fasts'/'fasting' match 'fast'"""
+    for suffix in ('ing', 'ed', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Lowercase terms of a text, stemmed and without stop words"""
+    return [
+        _stem(token.strip("'-"))
+        for token in _TOKEN_RE.findall(text.lower())
+        if token not in _STOP_WORDS
+    ]
+
+
+def gregorian_to_hijri(day):
+    """Convert a date to (year, month, day) in the tabular Islamic calendar
+
+    The tabular calendar can differ from local moon sighting by a day.
+    """
+    jd = day.toordinal() + 1721425
+    l = jd - 1948440 + 10632
+    n = (l - 1) // 10631
+    l = l - 10631 * n + 354
+    j = ((10985 - l) // 5316) * ((50 * l) // 17719) + (l // 5670) * ((43 * l) // 15238)
+    l = l - ((30 - j) // 15) * ((17719 * j) // 50) - (j // 16) * ((15238 * j) // 43) + 29
+    month = (24 * l) // 709
+    hijri_day = l - (709 * month) // 24
+    year = 30 * n + j - 30
+    return year, month, hijri_day
+
+
+def active_topic(when=None, rules=None):
+    """Topic selected by the first matching calendar rule, or None"""
+    when = when or date.today()
+    rules = DEFAULT_TOPIC_RULES if rules is None else rules
+    _, hijri_month, hijri_day = gregorian_to_hijri(when)
+
+    for rule in rules:
+        if 'weekday' in rule and when.weekday() != rule['weekday']:
+            continue
+        if 'hijri_month' in rule and hijri_month != rule['hijri_month']:
+            continue
+        if 'hijri_days' in rule:
+            first, last = rule['hijri_days']
+            if not first <= hijri_day <= last:
+                continue
+        return rule['topic']
+    return None
+
+
+class ContentIndex:
+    """Inverted index from terms and tags to content documents"""
+
+    def __init__(self, repeat_seconds=24 * 3600):
+        self.documents = []
+        self.terms = {}
+        self.tags = {}
+        self.types = {}
+        self.repeat_seconds = repeat_seconds
+        self._last_chosen = {}
+
+    def add(self, content, tags=()):
+        """Index a content dictionary, returning its document id"""
+        doc_id = len(self.documents)
+        self.documents.append(content)
+
+        text = ' '.join(
+            str(content.get(field, ''))
+            for field in ('translation', 'text', 'english', 'meaning', 'surah')
+        )
+        for term in set(tokenize(text)):
+            self.terms.setdefault(term, set()).add(doc_id)
+        for tag in tags:
+            self.tags.setdefault(tag.lower(), set()).add(doc_id)
+        self.types.setdefault(content.get('type'), set()).add(doc_id)
+        return doc_id
+
+    def search(self, keywords=(), tags=(), content_type=None, match_all=False):
+        """Document ids matching keywords and/or tags
+
+        By default any keyword or tag matches; with match_all every one
+        must match.
+        """
+        postings = []
+        for keyword in keywords:
+            for term in tokenize(keyword):
+                postings.append(self.terms.get(term, frozenset()))
+        for tag in tags:
+            postings.append(self.tags.get(tag.lower(), frozenset()))
+
+        if not postings:
+            result = set(range(len(self.documents)))
+        elif match_all:
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+                if not result:
+                    break
+        else:
+            result = set().union(*postings)
+
+        if content_type is not None:
+            result &= self.types.get(content_type, frozenset())
+        return sorted(result)
+
+    def search_topic(self, topic, content_type=None):
+        """Document ids related to a named topic"""
+        spec = TOPICS[topic]
+        return self.search(spec['keywords'], spec['tags'], content_type=content_type)
+
+    def choose(self, topic, content_type=None, now=None):
+        """Random content for a topic (a copy), or None if nothing matches
+
+        Documents chosen within the last repeat_seconds are skipped, so a
+        small topic returns None rather than repeating an item.
+        """
+        now = time.time() if now is None else now
+        doc_ids = [
+            doc_id for doc_id in self.search_topic(topic, content_type=content_type)
+            if now - self._last_chosen.get(doc_id, float('-inf')) >= self.repeat_seconds
+        ]
+        if not doc_ids:
+            return None
+        doc_id = random.choice(doc_ids)
+        self._last_chosen[doc_id] = now
+        return dict(self.documents[doc_id])
+
+
+def load_themed_content(path=THEMED_CONTENT_FILE):
+    """Load the bundled themed corpus as (content, tags) pairs"""
+    with open(path, 'r', encoding='utf-8') as f:
+        documents = json.load(f)
+    return [
+        ({key: value for key, value in doc.items() if key != 'tags'}, doc.get('tags', []))
+        for doc in documents
+    ]
+
+
+def build_default_index():
+    """Index of the bundled themed corpus and the dua collection"""
+    index = ContentIndex()
+    for content, tags in load_themed_content():
+        index.add(content, tags)
+    for dua in load_static_content().duas:
+        index.add({
+            'type': 'dua',
+            'arabic': dua.arabic,
+            'translation': dua.translation,
+            'reference': dua.reference,
+            'category': dua.category
+        }, tags=(dua.category,) + dua.tags)
+    logging.info(f"Content index built: {len(index.documents)} documents, {len(index.terms)} terms")
+    return index
+
+
+if __name__ == "__main__":
+    # Test the index
+    import time
+
+    index = build_default_index()
+    today = date.today()
+    print(f"Hijri date: {gregorian_to_hijri(today)}, topic: {active_topic(today)}")
+
+    for topic in TOPICS:
+        started = time.perf_counter()
+        doc_ids = index.search_topic(topic)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        print(f"{topic}: {len(doc_ids)} documents in {elapsed_us:.0f} us")
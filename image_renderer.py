@@ -0,0 +1,475 @@
+"""Verse Card Renderer
+
+Renders Islamic content (Arabic text plus translation) into shareable image
+cards using Pillow. Cards are stored in a content-addressed cache so each
+card is only ever drawn once.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+# Card templates (colors are RGB, sizes are fractions of card width)
+CARD_TEMPLATES = {
+    'classic': {
+        'background': (14, 59, 46),
+        'accent': (212, 175, 55),
+        'text': (250, 247, 240),
+        'muted': (190, 205, 195),
+        'title_size': 0.045,
+        'arabic_size': 0.060,
+        'text_size': 0.036,
+        'reference_size': 0.030,
+        'padding': 0.08,
+    },
+    'light': {
+        'background': (250, 247, 240),
+        'accent': (102, 126, 234),
+        'text': (40, 40, 40),
+        'muted': (110, 110, 110),
+        'title_size': 0.045,
+        'arabic_size': 0.060,
+        'text_size': 0.036,
+        'reference_size': 0.030,
+        'padding': 0.08,
+    },
+}
+
+CARD_TITLES = {
+    'quran': 'Quran Verse of the Day',
+    'hadith': 'Hadith of the Day',
+    'dua': 'Dua of the Day',
+    'allah_name': 'Name of Allah',
+}
+
+MAX_TRANSLATION_LINES = 12
+
+# Long texts shrink down to this fraction of the template font sizes before
+# lines are cut
+MIN_FONT_SCALE = 0.6
+
+# Per-process font table, filled by _load_fonts (also the pool initializer).
+# Missing latin fonts fall back to Pillow's bundled font.
+_FONT_PATHS = {}
+_FONTS = {}
+_USE_RAQM = features.check('raqm')
+
+
+def _load_fonts(font_paths, preload=()):
+    """Register font files and pre-load (role, pixel size) pairs"""
+    global _FONT_PATHS
+    if font_paths != _FONT_PATHS:
+        _FONT_PATHS = dict(font_paths)
+        _FONTS.clear()
+        _text_width.cache_clear()
+        _wrap_text.cache_clear()
+        _shaped_line.cache_clear()
+    for role, px in preload:
+        _font(role, px)
+
+
+def _font(role, px):
+    """Get a loaded font, loading it on first use"""
+    key = (role, px)
+    font = _FONTS.get(key)
+    if font is None:
+        try:
+            layout = ImageFont.Layout.RAQM if _USE_RAQM else ImageFont.Layout.BASIC
+            font = ImageFont.truetype(_FONT_PATHS[role], px, layout_engine=layout)
+        except (OSError, KeyError):
+            logging.warning(f"Font for '{role}' not found, using default font")
+            font = ImageFont.load_default(size=px)
+        _FONTS[key] = font
+    return font
+
+
+def arabic_supported(font_paths):
+    """Whether Arabic can be drawn correctly with these fonts
+
+    Needs Pillow built with libraqm for shaping and right-to-left layout,
+    and an Arabic font file (Pillow's bundled font has no Arabic glyphs).
+    """
+    path = font_paths.get('arabic')
+    return _USE_RAQM and bool(path) and os.path.isfile(path)
+
+
+def _font_signature(font_paths):
+    """Font paths with file size and modification time, for cache keys"""
+    signature = {}
+    for role, path in sorted(font_paths.items()):
+        try:
+            stat = os.stat(path)
+            signature[role] = [path, stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            signature[role] = [path, None, None]
+    return signature
+
+
+def _text_kwargs(role):
+    """Layout options for a font role"""
+    if role == 'arabic' and _USE_RAQM:
+        return {'direction': 'rtl', 'language': 'ar'}
+    return {}
+
+
+@lru_cache(maxsize=8192)
+def _text_width(role, px, text):
+    """Measured width of a text run (word/glyph cache)"""
+    return _font(role, px).getlength(text, **_text_kwargs(role))
+
+
+@lru_cache(maxsize=2048)
+def _wrap_text(role, px, text, max_width):
+    """Greedy word wrap of text into lines no wider than max_width"""
+    space = _text_width(role, px, ' ')
+    lines = []
+    for paragraph in text.splitlines():
+        current, width = [], 0.0
+        for word in paragraph.split():
+            word_width = _text_width(role, px, word)
+            if current and width + space + word_width > max_width:
+                lines.append(' '.join(current))
+                current, width = [word], word_width
+            else:
+                width += word_width + (space if current else 0)
+                current.append(word)
+        if current:
+            lines.append(' '.join(current))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=1024)
+def _shaped_line(role, px, line):
+    """Render a single shaped line into a reusable alpha mask"""
+    font = _font(role, px)
+    kwargs = _text_kwargs(role)
+    left, top, right, bottom = font.getbbox(line, **kwargs)
+    mask = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), line, font=font, fill=255, **kwargs)
+    return mask
+
+
+def _card_fields(content):
+    """Extract the text blocks shown on a card"""
+    content_type = content.get('type')
+    if content_type == 'quran':
+        return {
+            'arabic': content.get('arabic', ''),
+            'text': content.get('translation', ''),
+            'reference': f"{content.get('surah', '')} {content.get('reference', '')}".strip(),
+        }
+    if content_type == 'hadith':
+        return {
+            'arabic': content.get('arabic', ''),
+            'text': content.get('text', ''),
+            'reference': content.get('reference', ''),
+        }
+    if content_type == 'dua':
+        return {
+            'arabic': content.get('arabic', ''),
+            'text': content.get('translation', ''),
+            'reference': content.get('reference', ''),
+        }
+    if content_type == 'allah_name':
+        return {
+            'arabic': content.get('arabic', ''),
+            'text': f"{content.get('english', '')}\n{content.get('meaning', '')}",
+            'reference': '',
+        }
+    raise ValueError(f"Cannot render card for content type: {content_type}")
+
+
+def _font_sizes(template, size):
+    """Pixel sizes for each font role on a card of the given size"""
+    width = size[0]
+    return {
+        'title': max(8, int(width * template['title_size'])),
+        'arabic': max(8, int(width * template['arabic_size'])),
+        'text': max(8, int(width * template['text_size'])),
+        'reference': max(8, int(width * template['reference_size'])),
+    }
+
+
+def _draw_block(card, role, px, lines, y, color, line_gap):
+    """Paste cached line masks centered on the card, returning the new y"""
+    for line in lines:
+        mask = _shaped_line(role, px, line)
+        x = (card.width - mask.width) // 2
+        card.paste(color, (x, y, x + mask.width, y + mask.height), mask)
+        y += px + line_gap
+    return y
+
+
+def _truncate(lines, count):
+    """First count lines, marking the cut on the last one"""
+    if len(lines) <= count:
+        return lines
+    return lines[:count - 1] + (lines[count - 1] + ' ...',)
+
+
+def _arabic_height(px, lines):
+    """Height of the Arabic block including the divider below it"""
+    return len(lines) * (px + px // 2) + px // 3 + px // 2 if lines else 0
+
+
+def _text_height(px, lines):
+    """Height of the translation block"""
+    return len(lines) * (px + px // 3)
+
+
+def _fit_blocks(fields, sizes, max_width, available, draw_arabic):
+    """Font sizes and lines for the Arabic and translation blocks
+
+    Shrinks both fonts until the blocks fit the available height, then
+    cuts lines (translation first, keeping at least one) if they still
+    do not fit at the smallest size.
+    """
+    arabic_text = fields['arabic'] if draw_arabic else ''
+    scale = 1.0
+    while True:
+        arabic_px = max(8, int(sizes['arabic'] * scale))
+        text_px = max(8, int(sizes['text'] * scale))
+        arabic_lines = _wrap_text('arabic', arabic_px, arabic_text, max_width) if arabic_text else ()
+        text_lines = _truncate(_wrap_text('latin', text_px, fields['text'], max_width), MAX_TRANSLATION_LINES)
+        needed = _arabic_height(arabic_px, arabic_lines) + _text_height(text_px, text_lines)
+        if needed <= available or scale <= MIN_FONT_SCALE:
+            break
+        scale = max(MIN_FONT_SCALE, scale - 0.1)
+
+    if needed > available:
+        text_line = text_px + text_px // 3
+        arabic_line = arabic_px + arabic_px // 2
+        if arabic_lines:
+            room = available - text_line - (arabic_px // 3 + arabic_px // 2)
+            arabic_lines = _truncate(arabic_lines, max(1, room // arabic_line))
+        room = available - _arabic_height(arabic_px, arabic_lines)
+        text_lines = _truncate(text_lines, max(1, room // text_line))
+    return arabic_px, arabic_lines, text_px, text_lines
+
+
+def _render_card(job):
+    """Render one card to PNG bytes (runs inside pool workers)"""
+    content, template_name, size, draw_arabic = job
+    started = time.perf_counter()
+
+    template = CARD_TEMPLATES[template_name]
+    fields = _card_fields(content)
+    sizes = _font_sizes(template, size)
+    width, height = size
+    padding = int(width * template['padding'])
+    max_width = width - 2 * padding
+
+    card = Image.new('RGB', size, template['background'])
+    draw = ImageDraw.Draw(card)
+    draw.rectangle(
+        (padding // 2, padding // 2, width - padding // 2, height - padding // 2),
+        outline=template['accent'],
+        width=max(2, width // 270)
+    )
+
+    title = CARD_TITLES.get(content['type'], '')
+    y = padding
+    y = _draw_block(card, 'latin', sizes['title'], (title,), y, template['accent'], sizes['title'] // 2)
+    y += sizes['title'] // 2
+
+    # Arabic and translation must end above the reference line
+    bottom = height - padding
+    if fields['reference']:
+        bottom -= sizes['reference'] + sizes['reference'] // 2
+    arabic_px, arabic_lines, text_px, text_lines = _fit_blocks(
+        fields, sizes, max_width, bottom - y, draw_arabic
+    )
+
+    if arabic_lines:
+        y = _draw_block(card, 'arabic', arabic_px, arabic_lines, y, template['text'], arabic_px // 2)
+        y += arabic_px // 3
+        draw.line((width // 3, y, 2 * width // 3, y), fill=template['accent'], width=2)
+        y += arabic_px // 2
+
+    _draw_block(card, 'latin', text_px, text_lines, y, template['text'], text_px // 3)
+
+    if fields['reference']:
+        reference_y = height - padding - sizes['reference']
+        _draw_block(card, 'latin', sizes['reference'], (fields['reference'],),
+                    reference_y, template['muted'], 0)
+
+    buffer = BytesIO()
+    card.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue(), (time.perf_counter() - started) * 1000
+
+
+class VerseCardRenderer:
+    """Render content dictionaries into cached PNG cards"""
+
+    def __init__(self, cache_dir=None, template=None, size=None, font_paths=None, workers=None):
+        # Import config here so the renderer can be used without it
+        from config import CARD_CACHE_DIR, CARD_TEMPLATE, CARD_SIZE, CARD_FONTS
+
+        template = template or CARD_TEMPLATE
+        if template not in CARD_TEMPLATES:
+            raise ValueError(f"Unknown card template: {template}")
+        self.cache_dir = cache_dir or CARD_CACHE_DIR
+        self.template = template
+        self.size = tuple(size or CARD_SIZE)
+        self.font_paths = dict(font_paths or CARD_FONTS)
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self.render_times = []
+        self._pool = None
+        self.draw_arabic = arabic_supported(self.font_paths)
+        self._fonts_key = _font_signature(self.font_paths)
+        if not self.draw_arabic:
+            logging.warning(
+                "Arabic text needs Pillow with libraqm and an Arabic font "
+                f"({self.font_paths.get('arabic')}); cards will show the translation only"
+            )
+        logging.info("Verse Card Renderer initialized")
+
+    def cache_key(self, content, template=None, size=None):
+        """Content-addressed key for a card"""
+        payload = json.dumps({
+            'content': _card_fields(content),
+            'type': content.get('type'),
+            'template': template or self.template,
+            'size': list(size or self.size),
+            'fonts': self._fonts_key,
+            'arabic': self.draw_arabic,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def cache_path(self, key):
+        """File path for a cached card"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def render(self, content, template=None, size=None):
+        """Render a single card in-process and return its result"""
+        return self.render_batch([content], template=template, size=size, parallel=False)[0]
+
+    def render_batch(self, contents, template=None, size=None, parallel=True):
+        """Render many cards, drawing only those missing from the cache
+
+        Returns one result dict per content with the card path, whether
+        it was a cache hit, and the render time in milliseconds.
+        """
+        template = template or self.template
+        size = tuple(size or self.size)
+        if template not in CARD_TEMPLATES:
+            raise ValueError(f"Unknown card template: {template}")
+
+        results = []
+        pending = {}
+        for content in contents:
+            key = self.cache_key(content, template, size)
+            path = self.cache_path(key)
+            result = {'key': key, 'path': path, 'cached': False, 'render_ms': 0.0}
+            if key in pending or os.path.exists(path):
+                result['cached'] = True
+                self.hits += 1
+            else:
+                pending[key] = (content, template, size, self.draw_arabic)
+                self.misses += 1
+            results.append(result)
+
+        if pending:
+            jobs = list(pending.values())
+            if parallel and len(jobs) > 1:
+                rendered = list(self._get_pool().map(_render_card, jobs))
+            else:
+                _load_fonts(self.font_paths, self._preload_list(template, size))
+                rendered = [_render_card(job) for job in jobs]
+
+            timings = {}
+            for key, (png, elapsed_ms) in zip(pending, rendered):
+                self._store(key, png)
+                timings[key] = elapsed_ms
+                self.render_times.append(elapsed_ms)
+                logging.info(f"Rendered card {key[:12]} in {elapsed_ms:.1f} ms")
+
+            for result in results:
+                if not result['cached']:
+                    result['render_ms'] = timings[result['key']]
+
+        logging.info(
+            f"Card batch: {len(results)} cards, {len(pending)} rendered, "
+            f"hit rate {self.hit_rate:.0%}"
+        )
+        return results
+
+    @property
+    def hit_rate(self):
+        """Fraction of card requests served from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self):
+        """Cache and render time statistics"""
+        count = len(self.render_times)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'rendered': count,
+            'avg_render_ms': sum(self.render_times) / count if count else 0.0,
+            'max_render_ms': max(self.render_times) if count else 0.0,
+        }
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _preload_list(self, template, size):
+        """Font (role, size) pairs a template needs"""
+        sizes = _font_sizes(CARD_TEMPLATES[template], size)
+        preload = (
+            ('latin', sizes['title']),
+            ('latin', sizes['text']),
+            ('latin', sizes['reference']),
+        )
+        if self.draw_arabic:
+            preload += (('arabic', sizes['arabic']),)
+        return preload
+
+    def _get_pool(self):
+        """Start the worker pool with fonts pre-loaded in every process"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_load_fonts,
+                initargs=(self.font_paths, self._preload_list(self.template, self.size))
+            )
+        return self._pool
+
+    def _store(self, key, png):
+        """Atomically write a card into the cache"""
+        path = self.cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    # Test the renderer
+    from islamic_content import IslamicContentFetcher
+
+    fetcher = IslamicContentFetcher()
+    renderer = VerseCardRenderer()
+
+    contents = [fetcher.get_daily_dua() for _ in range(5)] + [fetcher._get_fallback_quran()]
+    for result in renderer.render_batch(contents):
+        status = 'cached' if result['cached'] else f"{result['render_ms']:.1f} ms"
+        print(f"{result['path']} ({status})")
+    print(renderer.get_stats())
+    renderer.close()
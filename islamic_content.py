@@ -8,10 +8,14 @@ import random
 import logging
 from datetime import datetime
 
+from content_index import active_topic, build_default_index
+from message_templates import MessageTemplates
+from static_content import load_static_content
+
 class IslamicContentFetcher:
     """Fetch Islamic content from various APIs"""
     
-    def __init__(self):
+    def __init__(self, templates=None):
         self.quran_api = "https://api.alquran.cloud/v1"
         self.hadith_api = "https://hadithapi.com/api"
         self.hadith_api_key = "YOUR_API_KEY"  # Get from hadithapi.com
@@ -20,6 +24,12 @@ class IslamicContentFetcher:
         self.quran_api_alt = "https://quranapi.pages.dev/api"
         self.hadith_github = "https://cdn.jsdelivr.net/gh/fawazahmed0/hadith-api@1"
         
+        # Message templates, compiled once
+        self.templates = templates or MessageTemplates()
+        
+        # Topic index, built on first use
+        self._content_index = None
+        
         logging.info("Islamic Content Fetcher initialized")
     
     def get_random_ayah(self):
@@ -91,123 +101,64 @@ class IslamicContentFetcher:
             logging.error(f"Error fetching Hadith: {str(e)}")
             return self._get_fallback_hadith()
     
-    def get_daily_dua(self):
-        """Get a daily dua/supplication"""
-        duas = [
-            {
-                'arabic': 'رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَفِي الْآخِرَةِ حَسَنَةً وَقِنَا عَذَابَ النَّارِ',
-                'translation': 'Our Lord, give us good in this world and good in the Hereafter, and protect us from the punishment of the Fire.',
-                'reference': 'Quran 2:201'
-            },
-            {
-                'arabic': 'رَبِّ اشْرَحْ لِي صَدْرِي وَيَسِّرْ لِي أَمْرِي',
-                'translation': 'My Lord, expand for me my breast and ease for me my task.',
-                'reference': 'Quran 20:25-26'
-            },
-            {
-                'arabic': 'رَبَّنَا لَا تُزِغْ قُلُوبَنَا بَعْدَ إِذْ هَدَيْتَنَا وَهَبْ لَنَا مِن لَّدُنكَ رَحْمَةً',
-                'translation': 'Our Lord, do not let our hearts deviate after You have guided us, and grant us mercy from Yourself.',
-                'reference': 'Quran 3:8'
-            },
-            {
-                'arabic': 'اللَّهُمَّ إِنِّي أَسْأَلُكَ الْهُدَىٰ وَالتُّقَىٰ وَالْعَفَافَ وَالْغِنَىٰ',
-                'translation': 'O Allah, I ask You for guidance, piety, chastity, and sufficiency.',
-                'reference': 'Sahih Muslim'
-            },
-            {
-                'arabic': 'حَسْبُنَا اللَّهُ وَنِعْمَ الْوَكِيلُ',
-                'translation': 'Sufficient for us is Allah, and He is the best Disposer of affairs.',
-                'reference': 'Quran 3:173'
-            }
-        ]
+    def get_daily_dua(self, category=None):
+        """Get a daily dua/supplication, optionally from one category or tag"""
+        data = load_static_content()
+        if category is None:
+            duas = data.duas
+        elif category in data.dua_categories:
+            duas = data.dua_categories[category]
+        else:
+            raise ValueError(f"Unknown dua category: {category}")
         
         dua = random.choice(duas)
         return {
             'type': 'dua',
-            'arabic': dua['arabic'],
-            'translation': dua['translation'],
-            'reference': dua['reference']
+            'arabic': dua.arabic,
+            'translation': dua.translation,
+            'reference': dua.reference,
+            'category': dua.category
         }
     
+    def get_dua_categories(self):
+        """List available dua categories and tags"""
+        return sorted(load_static_content().dua_categories)
+    
     def get_allah_name(self):
         """Get one of the 99 names of Allah"""
-        names = [
-            {'arabic': 'ٱلرَّحْمَـٰنُ', 'english': 'Ar-Rahman', 'meaning': 'The Most Merciful'},
-            {'arabic': 'ٱلرَّحِيمُ', 'english': 'Ar-Raheem', 'meaning': 'The Bestower of Mercy'},
-            {'arabic': 'ٱلْمَلِكُ', 'english': 'Al-Malik', 'meaning': 'The King'},
-            {'arabic': 'ٱلْقُدُّوسُ', 'english': 'Al-Quddus', 'meaning': 'The Most Holy'},
-            {'arabic': 'ٱلسَّلَامُ', 'english': 'As-Salam', 'meaning': 'The Source of Peace'},
-            {'arabic': 'ٱلْعَزِيزُ', 'english': 'Al-Aziz', 'meaning': 'The All Mighty'},
-            {'arabic': 'ٱلْحَكِيمُ', 'english': 'Al-Hakim', 'meaning': 'The All Wise'},
-            {'arabic': 'ٱللَّطِيفُ', 'english': 'Al-Latif', 'meaning': 'The Subtle One'},
-            {'arabic': 'ٱلْخَبِيرُ', 'english': 'Al-Khabir', 'meaning': 'The All Aware'},
-            {'arabic': 'ٱلْغَفُورُ', 'english': 'Al-Ghafoor', 'meaning': 'The All Forgiving'}
-        ]
-        
-        name = random.choice(names)
+        name = random.choice(load_static_content().names)
         return {
             'type': 'allah_name',
-            'arabic': name['arabic'],
-            'english': name['english'],
-            'meaning': name['meaning']
+            'arabic': name.arabic,
+            'english': name.english,
+            'meaning': name.meaning
         }
     
-    def format_for_whatsapp(self, content):
-        """Format content for WhatsApp posting"""
-        if content['type'] == 'quran':
-            return f"""🕌 *Quran Verse of the Day*
-
-📖 _{content['surah']}_ ({content['surah_arabic']})
-🔢 Ayah {content['ayah']}
-
-*Arabic:*
-{content['arabic']}
-
-*Translation:*
-{content['translation']}
-
-━━━━━━━━━━━━━━━
-📚 Reference: {content['reference']}
-💚 Share the knowledge
-"""
-        
-        elif content['type'] == 'hadith':
-            return f"""📜 *Hadith of the Day*
-
-{content['text']}
-
-━━━━━━━━━━━━━━━
-📚 {content['reference']}
-🤲 May Allah guide us all
-"""
-        
-        elif content['type'] == 'dua':
-            return f"""🤲 *Dua of the Day*
-
-*Arabic:*
-{content['arabic']}
-
-*Translation:*
-{content['translation']}
-
-━━━━━━━━━━━━━━━
-📚 {content['reference']}
-💚 Ameen
-"""
+    @property
+    def content_index(self):
+        """Inverted index over the local themed corpus"""
+        if self._content_index is None:
+            self._content_index = build_default_index()
+        return self._content_index
+    
+    def get_topical_content(self, when=None, rules=None):
+        """Get content matching the calendar topic for a date (Ramadan, Jumu'ah, Hajj)
         
-        elif content['type'] == 'allah_name':
-            return f"""✨ *Name of Allah*
-
-{content['arabic']}
-*{content['english']}*
-
-📖 Meaning: {content['meaning']}
-
-━━━━━━━━━━━━━━━
-🤲 SubhanAllah
-"""
+        Returns None when no calendar rule applies or every matching item
+        was already posted in the last day.
+        """
+        topic = active_topic(when, rules)
+        if topic is None:
+            return None
         
-        return str(content)
+        content = self.content_index.choose(topic)
+        if content is not None:
+            logging.info(f"Selected {content['type']} for topic: {topic}")
+        return content
+    
+    def format_for_whatsapp(self, content, language=None):
+        """Format content for WhatsApp posting"""
+        return self.templates.render(content, language)
     
     def _get_fallback_quran(self):
         """Fallback Quran verse if API fails"""
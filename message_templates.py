@@ -0,0 +1,222 @@
+"""WhatsApp Message Templates
+
+Per-type and per-language message templates, compiled and validated once,
+with a batch API that renders a whole fan-out in one pass.
+"""
+
+import logging
+from string import Formatter
+
+DIVIDER = "━━━━━━━━━━━━━━━"
+
+TEMPLATES = {
+    'en': {
+        'quran': f"""🕌 *Quran Verse of the Day*
+
+📖 _{{surah}}_ ({{surah_arabic}})
+🔢 Ayah {{ayah}}
+
+*Arabic:*
+{{arabic}}
+
+*Translation:*
+{{translation}}
+
+{DIVIDER}
+📚 Reference: {{reference}}
+💚 Share the knowledge
+""",
+        'hadith': f"""📜 *Hadith of the Day*
+
+{{text}}
+
+{DIVIDER}
+📚 {{reference}}
+🤲 May Allah guide us all
+""",
+        'dua': f"""🤲 *Dua of the Day*
+
+*Arabic:*
+{{arabic}}
+
+*Translation:*
+{{translation}}
+
+{DIVIDER}
+📚 {{reference}}
+💚 Ameen
+""",
+        'allah_name': f"""✨ *Name of Allah*
+
+{{arabic}}
+*{{english}}*
+
+📖 Meaning: {{meaning}}
+
+{DIVIDER}
+🤲 SubhanAllah
+""",
+    },
+    'ur': {
+        'quran': f"""🕌 *آج کی آیت*
+
+📖 _{{surah}}_ ({{surah_arabic}})
+🔢 آیت {{ayah}}
+
+*عربی:*
+{{arabic}}
+
+*انگریزی ترجمہ:*
+{{translation}}
+
+{DIVIDER}
+📚 حوالہ: {{reference}}
+💚 علم کو پھیلائیں
+""",
+        'hadith': f"""📜 *آج کی حدیث*
+
+*انگریزی ترجمہ:*
+{{text}}
+
+{DIVIDER}
+📚 {{reference}}
+🤲 اللہ ہم سب کو ہدایت دے
+""",
+        'dua': f"""🤲 *آج کی دعا*
+
+*عربی:*
+{{arabic}}
+
+*انگریزی ترجمہ:*
+{{translation}}
+
+{DIVIDER}
+📚 {{reference}}
+💚 آمین
+""",
+        'allah_name': f"""✨ *اللہ کا نام*
+
+{{arabic}}
+*{{english}}*
+
+📖 انگریزی میں معنی: {{meaning}}
+
+{DIVIDER}
+🤲 سبحان اللہ
+""",
+    },
+}
+
+# Fields each content type provides. Translations, hadith texts and meanings
+# are fetched in English, so other languages label them as English.
+CONTENT_FIELDS = {
+    'quran': {'arabic', 'translation', 'surah', 'surah_arabic', 'ayah', 'reference'},
+    'hadith': {'text', 'reference', 'collection'},
+    'dua': {'arabic', 'translation', 'reference', 'category'},
+    'allah_name': {'arabic', 'english', 'meaning'},
+}
+
+
+def compile_template(source, content_type):
+    """Compile a template into (literal, field) pairs, validating its fields"""
+    parts = []
+    for literal, field, format_spec, conversion in Formatter().parse(source):
+        if field is not None:
+            if field not in CONTENT_FIELDS[content_type]:
+                raise ValueError(f"Unknown field '{field}' in {content_type} template")
+            if format_spec or conversion:
+                raise ValueError(f"Format specs are not supported in {content_type} template")
+        parts.append((literal, field))
+    return tuple(parts)
+
+
+class MessageTemplates:
+    """Compiled message templates for every content type and language"""
+
+    def __init__(self, templates=None, default_language='en', target_languages=None):
+        templates = TEMPLATES if templates is None else templates
+        self.compiled = {}
+        for language, sources in templates.items():
+            missing = set(CONTENT_FIELDS) - set(sources)
+            if missing:
+                raise ValueError(f"Language '{language}' is missing templates: {sorted(missing)}")
+            self.compiled[language] = {
+                content_type: compile_template(source, content_type)
+                for content_type, source in sources.items()
+            }
+
+        self.target_languages = dict(target_languages or {})
+        for language in {default_language, *self.target_languages.values()}:
+            if language not in self.compiled:
+                raise ValueError(f"No templates for language: {language}")
+        self.default_language = default_language
+        logging.info(f"Message templates compiled for: {', '.join(sorted(self.compiled))}")
+
+    @property
+    def languages(self):
+        """Languages with compiled templates"""
+        return sorted(self.compiled)
+
+    def language_for(self, target):
+        """Message language of a target"""
+        return self.target_languages.get(target, self.default_language)
+
+    def render(self, content, language=None):
+        """Render one content dictionary as a WhatsApp message"""
+        return self._render(content, self._values(content), language or self.default_language)
+
+    def render_many(self, contents, targets):
+        """Render every content for every target in one pass
+
+        Returns one {target: message} dict per content. Each message is
+        rendered once per language and the same string is shared by all
+        targets using that language.
+        """
+        languages = {target: self.language_for(target) for target in targets}
+        rendered = []
+        for content in contents:
+            values = self._values(content)
+            by_language = {
+                language: self._render(content, values, language)
+                for language in set(languages.values())
+            }
+            rendered.append({target: by_language[language] for target, language in languages.items()})
+        return rendered
+
+    def _values(self, content):
+        """String values of a content's fields, converted once"""
+        content_type = content.get('type')
+        if content_type not in CONTENT_FIELDS:
+            raise ValueError(f"Unknown content type: {content_type}")
+        return {field: str(content[field]) for field in CONTENT_FIELDS[content_type] if field in content}
+
+    def _render(self, content, values, language):
+        """Fill a compiled template"""
+        try:
+            parts = self.compiled[language][content['type']]
+        except KeyError:
+            raise ValueError(f"No templates for language: {language}")
+
+        pieces = []
+        for literal, field in parts:
+            pieces.append(literal)
+            if field is not None:
+                try:
+                    pieces.append(values[field])
+                except KeyError:
+                    raise ValueError(f"{content['type']} content is missing field: {field}")
+        return ''.join(pieces)
+
+
+if __name__ == "__main__":
+    # Test the templates
+    templates = MessageTemplates(target_languages={'urdu-group': 'ur'})
+    content = {
+        'type': 'dua',
+        'arabic': 'حَسْبُنَا اللَّهُ وَنِعْمَ الْوَكِيلُ',
+        'translation': 'Sufficient for us is Allah, and He is the best Disposer of affairs.',
+        'reference': 'Quran 3:173'
+    }
+    for target, message in templates.render_many([content], ['english-group', 'urdu-group'])[0].items():
+        print(f"--- {target} ---")
+        print(message)
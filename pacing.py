@@ -0,0 +1,111 @@
+"""Adaptive Send Pacing
+
+Learns how fast each send backend can safely go. Delays between sends shrink
+additively while sends are confirmed and back off multiplicatively on errors,
+throttling or latency spikes (AIMD). Backends that cannot confirm delivery
+never go faster than their configured pace.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+
+class PacingController:
+    """AIMD delay control per send backend"""
+
+    def __init__(self, initial_delay=60, min_delay=5, max_delay=300,
+                 decrease_step=5, backoff_factor=2.0, latency_alpha=0.3,
+                 slow_factor=2.0, history=200):
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.decrease_step = decrease_step
+        self.backoff_factor = backoff_factor
+        self.latency_alpha = latency_alpha
+        self.slow_factor = slow_factor
+        self.decisions = deque(maxlen=history)
+        self._backends = {}
+        self._lock = threading.Lock()
+        logging.info("Pacing controller initialized")
+
+    def _state(self, backend):
+        """Per-backend state, created on first use"""
+        state = self._backends.get(backend)
+        if state is None:
+            state = {
+                'delay': self.initial_delay,
+                'latency': None,
+                'successes': 0,
+                'failures': 0,
+                'throttles': 0
+            }
+            self._backends[backend] = state
+        return state
+
+    def record(self, backend, latency, success, throttled=False, retry_after=None,
+               confirmed=True):
+        """Record a send outcome and adjust the backend's delay
+
+        Only confirmed successes shrink the delay below its initial
+        value. A success without a delivery signal (confirmed=False) only
+        recovers from earlier backoff, back to the initial pace.
+        """
+        with self._lock:
+            state = self._state(backend)
+            before = state['delay']
+            average = state['latency']
+            slow = average is not None and latency > average * self.slow_factor
+
+            if throttled:
+                outcome = 'throttled'
+                state['throttles'] += 1
+                state['delay'] = min(self.max_delay, max(before * self.backoff_factor, retry_after or 0))
+            elif not success:
+                outcome = 'failure'
+                state['failures'] += 1
+                state['delay'] = min(self.max_delay, before * self.backoff_factor)
+            elif slow:
+                # Latency spike: hold the current pace
+                outcome = 'slow'
+                state['successes'] += 1
+            elif not confirmed:
+                # No evidence the send arrived: never go faster than the initial pace
+                outcome = 'unconfirmed'
+                state['successes'] += 1
+                state['delay'] = max(min(before, self.initial_delay), before - self.decrease_step)
+            else:
+                outcome = 'success'
+                state['successes'] += 1
+                state['delay'] = max(self.min_delay, before - self.decrease_step)
+
+            state['latency'] = latency if average is None else (
+                self.latency_alpha * latency + (1 - self.latency_alpha) * average)
+
+            decision = {
+                'time': time.time(),
+                'backend': backend,
+                'outcome': outcome,
+                'latency': round(latency, 3),
+                'delay_before': before,
+                'delay_after': state['delay']
+            }
+            self.decisions.append(decision)
+
+        if outcome not in ('success', 'unconfirmed'):
+            logging.info(f"Pacing {backend}: {outcome}, delay {before:.1f}s -> {decision['delay_after']:.1f}s")
+        return decision
+
+    def next_delay(self, backend):
+        """Seconds to wait before the next send on a backend"""
+        with self._lock:
+            return self._state(backend)['delay']
+
+    def get_status(self, decisions=20):
+        """Current state per backend and the most recent decisions"""
+        with self._lock:
+            return {
+                'backends': {name: dict(state) for name, state in self._backends.items()},
+                'decisions': list(self.decisions)[-decisions:]
+            }
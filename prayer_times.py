@@ -0,0 +1,184 @@
+"""Prayer Time Calculator
+
+Computes salah times locally from standard astronomical formulas, with no
+network access. A whole year is computed at once for many locations using
+NumPy arrays of shape (days, locations).
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+# Twilight angles (degrees below horizon). An isha value in minutes is an
+# interval after maghrib instead of an angle.
+CALCULATION_METHODS = {
+    'MWL': {'fajr': 18.0, 'isha': 17.0},        # Muslim World League
+    'ISNA': {'fajr': 15.0, 'isha': 15.0},       # Islamic Society of North America
+    'Egypt': {'fajr': 19.5, 'isha': 17.5},      # Egyptian General Authority of Survey
+    'Makkah': {'fajr': 18.5, 'isha': '90 min'}, # Umm al-Qura University, Makkah
+    'Karachi': {'fajr': 18.0, 'isha': 18.0},    # University of Islamic Sciences, Karachi
+}
+
+# Shadow length factor for asr
+ASR_FACTORS = {
+    'Standard': 1,  # Shafi'i, Maliki, Hanbali
+    'Hanafi': 2,
+}
+
+PRAYERS = ('fajr', 'sunrise', 'dhuhr', 'asr', 'maghrib', 'isha')
+
+# Apparent sun altitude at sunrise/sunset (refraction and solar radius)
+SUNRISE_ALTITUDE = -0.833
+
+
+def _sin(x):
+    return np.sin(np.radians(x))
+
+
+def _cos(x):
+    return np.cos(np.radians(x))
+
+
+def _tan(x):
+    return np.tan(np.radians(x))
+
+
+def _julian_day(day):
+    """Julian day number at 00:00 UTC"""
+    return day.toordinal() + 1721424.5
+
+
+def sun_position(jd):
+    """Solar declination and equation of time (hours) for Julian days"""
+    d = jd - 2451545.0
+    g = (357.529 + 0.98560028 * d) % 360
+    q = (280.459 + 0.98564736 * d) % 360
+    lon = (q + 1.915 * _sin(g) + 0.020 * _sin(2 * g)) % 360
+    e = 23.439 - 0.00000036 * d
+
+    ra = np.degrees(np.arctan2(_cos(e) * _sin(lon), _cos(lon))) / 15.0
+    declination = np.degrees(np.arcsin(_sin(e) * _sin(lon)))
+    equation = q / 15.0 - ra % 24
+    equation = (equation + 12) % 24 - 12
+    return declination, equation
+
+
+def _hour_angle(altitude, latitude, declination):
+    """Hours between solar noon and the sun reaching an altitude
+
+    NaN where the sun never reaches the altitude (high latitudes).
+    """
+    cos_h = (_sin(altitude) - _sin(declination) * _sin(latitude)) / (
+        _cos(declination) * _cos(latitude))
+    with np.errstate(invalid='ignore'):
+        return np.degrees(np.arccos(cos_h)) / 15.0
+
+
+class PrayerTimeTable:
+    """Precomputed prayer times for a range of days and a set of locations
+
+    Times are stored as float hours after 00:00 UTC of each day, in arrays
+    of shape (days, locations).
+    """
+
+    def __init__(self, start, times, locations):
+        self.start = start
+        self.times = times
+        self.locations = locations
+        self.days = times['dhuhr'].shape[0]
+
+    def day_index(self, day):
+        """Row index of a date in the table"""
+        index = (day - self.start).days
+        if not 0 <= index < self.days:
+            raise KeyError(f"{day} is outside the prayer time table")
+        return index
+
+    def times_for(self, day, location):
+        """Prayer times of one location on one day as UTC datetimes"""
+        index = self.day_index(day)
+        midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        result = {}
+        for prayer in PRAYERS:
+            hours = self.times[prayer][index, location]
+            if not np.isnan(hours):
+                result[prayer] = midnight + timedelta(minutes=round(float(hours) * 60))
+        return result
+
+
+def compute_table(locations, start, days=366, method='MWL', asr='Standard'):
+    """Compute prayer times for every day and location in one pass
+
+    locations is a sequence of dicts with 'latitude' and 'longitude' keys.
+    """
+    if method not in CALCULATION_METHODS:
+        raise ValueError(f"Unknown calculation method: {method}")
+    if asr not in ASR_FACTORS:
+        raise ValueError(f"Unknown asr method: {asr}")
+    params = CALCULATION_METHODS[method]
+
+    latitude = np.array([float(loc['latitude']) for loc in locations])[None, :]
+    longitude = np.array([float(loc['longitude']) for loc in locations])[None, :]
+    jd = _julian_day(start) + np.arange(days, dtype=float)[:, None]
+
+    # Sun position at approximate local noon of each location
+    declination, equation = sun_position(jd + 0.5 - longitude / 360.0)
+    dhuhr = 12.0 - longitude / 15.0 - equation
+
+    sun_angle = _hour_angle(SUNRISE_ALTITUDE, latitude, declination)
+    sunrise = dhuhr - sun_angle
+    maghrib = dhuhr + sun_angle
+
+    asr_altitude = np.degrees(np.arctan(
+        1.0 / (ASR_FACTORS[asr] + _tan(np.abs(latitude - declination)))))
+    asr_time = dhuhr + _hour_angle(asr_altitude, latitude, declination)
+
+    fajr = dhuhr - _hour_angle(-params['fajr'], latitude, declination)
+    if isinstance(params['isha'], str):
+        isha = maghrib + float(params['isha'].split()[0]) / 60.0
+    else:
+        isha = dhuhr + _hour_angle(-params['isha'], latitude, declination)
+
+    # High latitudes: cap fajr/isha at a portion of the night (angle-based rule)
+    night = 24.0 - (maghrib - sunrise)
+    fajr_limit = sunrise - night * params['fajr'] / 60.0
+    fajr = np.where(np.isnan(fajr) | (fajr < fajr_limit), fajr_limit, fajr)
+    if not isinstance(params['isha'], str):
+        isha_limit = maghrib + night * params['isha'] / 60.0
+        isha = np.where(np.isnan(isha) | (isha > isha_limit), isha_limit, isha)
+
+    times = {
+        'fajr': fajr,
+        'sunrise': sunrise,
+        'dhuhr': np.broadcast_to(dhuhr, fajr.shape),
+        'asr': asr_time,
+        'maghrib': maghrib,
+        'isha': isha,
+    }
+    times = {prayer: np.ascontiguousarray(values, dtype=np.float32) for prayer, values in times.items()}
+    logging.info(f"Computed prayer times for {days} days x {len(locations)} locations")
+    return PrayerTimeTable(start, times, list(locations))
+
+
+def compute_year(locations, year=None, method='MWL', asr='Standard'):
+    """Compute a full year's prayer time table"""
+    year = year or date.today().year
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    return compute_table(locations, start, days, method=method, asr=asr)
+
+
+if __name__ == "__main__":
+    # Test the calculator
+    cities = [
+        {'name': 'Makkah', 'latitude': 21.4225, 'longitude': 39.8262},
+        {'name': 'Karachi', 'latitude': 24.8607, 'longitude': 67.0011},
+        {'name': 'London', 'latitude': 51.5074, 'longitude': -0.1278},
+    ]
+    table = compute_year(cities, method='Karachi')
+    today = date.today()
+    for i, city in enumerate(cities):
+        print(f"\n{city['name']} ({today}, UTC)")
+        for prayer, when in table.times_for(today, i).items():
+            print(f"  {prayer:8} {when:%H:%M}")
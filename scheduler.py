@@ -7,46 +7,87 @@ import schedule
 import time
 import threading
 import logging
-from datetime import datetime
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 import random
 
+import numpy as np
+
+from prayer_times import compute_table
+from settings_store import diff_settings
+
 class IslamicScheduler:
     """Schedule and automate Islamic content posting"""
     
-    def __init__(self, content_fetcher, whatsapp_poster):
+    def __init__(self, content_fetcher, whatsapp_poster, settings_store=None, cluster=None):
         self.content_fetcher = content_fetcher
         self.whatsapp_poster = whatsapp_poster
+        self.settings_store = settings_store
+        self.cluster = cluster
+        self.settings_version = None
+        self.targets = []
+        self.posting_times = []
         self.is_running = False
         self.thread = None
+        self.prayer_table = None
+        self.prayer_locations = []
+        self.prayer_offsets = {}
+        self.prayer_method = None
+        self.prayer_asr = None
         logging.info("Islamic Scheduler initialized")
     
+    def choose_content(self):
+        """Pick random Islamic content for a post"""
+        from config import TOPIC_RULES, TOPIC_BIAS
+        
+        # Themed content on Ramadan, Jumu'ah and Hajj days
+        if random.random() < TOPIC_BIAS:
+            content = self.content_fetcher.get_topical_content(rules=TOPIC_RULES)
+            if content is not None:
+                return content
+        
+        # Choose random content type
+        content_types = ['quran', 'hadith', 'dua', 'allah_name']
+        weights = [0.4, 0.3, 0.2, 0.1]  # 40% Quran, 30% Hadith, etc.
+        content_type = random.choices(content_types, weights=weights)[0]
+        
+        # Fetch content
+        if content_type == 'quran':
+            return self.content_fetcher.get_random_ayah()
+        elif content_type == 'hadith':
+            return self.content_fetcher.get_random_hadith()
+        elif content_type == 'dua':
+            return self.content_fetcher.get_daily_dua()
+        else:
+            return self.content_fetcher.get_allah_name()
+    
     def post_random_content(self, targets):
         """Post random Islamic content"""
         try:
-            # Choose random content type
-            content_types = ['quran', 'hadith', 'dua', 'allah_name']
-            weights = [0.4, 0.3, 0.2, 0.1]  # 40% Quran, 30% Hadith, etc.
-            content_type = random.choices(content_types, weights=weights)[0]
-            
+            content = self.choose_content()
+        except Exception as e:
+            logging.error(f"Error posting content: {str(e)}")
+            return []
+        return self.post_content(content, targets)
+    
+    def post_content(self, content, targets, before_send=None, after_send=None):
+        """Post content to targets, each in its own language
+        
+        before_send and after_send are passed on to send_bulk.
+        """
+        try:
+            content_type = content['type']
             logging.info(f"Posting {content_type} content")
             
-            # Fetch content
-            if content_type == 'quran':
-                content = self.content_fetcher.get_random_ayah()
-            elif content_type == 'hadith':
-                content = self.content_fetcher.get_random_hadith()
-            elif content_type == 'dua':
-                content = self.content_fetcher.get_daily_dua()
-            else:
-                content = self.content_fetcher.get_allah_name()
-            
-            # Format message
-            message = self.content_fetcher.format_for_whatsapp(content)
+            # Format one message per target language
+            messages = self.content_fetcher.templates.render_many([content], targets)[0]
             
             # Post to all targets
-            results = self.whatsapp_poster.send_bulk(targets, message)
+            results = self.whatsapp_poster.send_bulk(
+                targets, messages, before_send=before_send, after_send=after_send
+            )
             
-            logging.info(f"Posted {content_type} to {len(targets)} targets")
+            logging.info(f"Posted {content_type} to {len(results)} targets")
             return results
         
         except Exception as e:
@@ -55,19 +96,201 @@ class IslamicScheduler:
     
     def setup_schedule(self, targets, posting_times):
         """Setup posting schedule"""
-        schedule.clear()
+        schedule.clear('posting')
+        self.targets = list(targets)
+        self.posting_times = []
         
         for post_time in posting_times:
-            schedule.every().day.at(post_time).do(
-                self.post_random_content,
-                targets=targets
+            self._add_posting_job(post_time)
+    
+    def _add_posting_job(self, post_time):
+        """Schedule a daily post, tagged so it can be removed on its own"""
+        schedule.every().day.at(post_time).do(
+            self.post_scheduled_content,
+            post_time=post_time
+        ).tag('posting', f'post-{post_time}')
+        self.posting_times.append(post_time)
+        logging.info(f"Scheduled post at {post_time}")
+    
+    def post_scheduled_content(self, post_time):
+        """Post to the current targets for a posting time"""
+        targets = list(self.targets)
+        if not targets:
+            logging.warning(f"No targets for post at {post_time}")
+            return []
+        return self._post_slot(f"{date.today().isoformat()}T{post_time}", targets)
+    
+    def _post_slot(self, slot, targets):
+        """Post a slot, only to this node's share of targets in cluster mode
+        
+        In cluster mode the slot's content is chosen once and shared by
+        every node.
+        """
+        if self.cluster is None:
+            return self.post_random_content(targets)
+        
+        try:
+            content, targets = self.cluster.open_slot(slot, targets, self.choose_content)
+        except Exception as e:
+            logging.error(f"Error opening cluster slot {slot}: {str(e)}")
+            return []
+        if not targets:
+            logging.info(f"No targets for this node in slot {slot}")
+            return []
+        return self._post_cluster_targets(slot, content, targets)
+    
+    def _post_cluster_targets(self, slot, content, targets, take_over=False):
+        """Post content, claiming each target right before it is sent"""
+        def claim(target):
+            try:
+                return self.cluster.claim_target(slot, target, take_over=take_over)
+            except Exception as e:
+                logging.error(f"Error claiming {target} for cluster slot {slot}: {str(e)}")
+                return False
+        
+        def finish(target, success):
+            try:
+                self.cluster.finish_target(slot, target, success)
+            except Exception as e:
+                logging.error(f"Error recording send to {target} for cluster slot {slot}: {str(e)}")
+        
+        return self.post_content(content, targets, before_send=claim, after_send=finish)
+    
+    def _recover_cluster_slots(self):
+        """Post targets that no live cluster node sent (runs on the leader)"""
+        try:
+            orphans = self.cluster.recover_orphans()
+        except Exception as e:
+            logging.error(f"Error recovering cluster slots: {str(e)}")
+            return
+        for slot, content, targets in orphans:
+            self._post_cluster_targets(slot, content, targets, take_over=True)
+    
+    def apply_settings(self, settings):
+        """Apply new targets and posting times to the running schedule
+        
+        Only added or removed posting jobs are touched; other jobs keep
+        their state.
+        """
+        current = {
+            'groups': self.targets,
+            'channels': [],
+            'posting_times': self.posting_times
+        }
+        changes = diff_settings(current, settings)
+        
+        for post_time in changes['removed_times']:
+            schedule.clear(f'post-{post_time}')
+            self.posting_times.remove(post_time)
+            logging.info(f"Removed post at {post_time}")
+        
+        for post_time in changes['added_times']:
+            self._add_posting_job(post_time)
+        
+        # Jobs read self.targets when they run
+        self.targets = settings['groups'] + settings['channels']
+        if changes['added_targets'] or changes['removed_targets']:
+            logging.info(
+                f"Targets updated: +{len(changes['added_targets'])} "
+                f"-{len(changes['removed_targets'])}"
             )
-            logging.info(f"Scheduled post at {post_time}")
+        return changes
     
+    def reload_settings(self):
+        """Apply settings store changes since the last reload"""
+        if self.settings_store is None:
+            return None
+        self.settings_store.poll()
+        if self.settings_store.version == self.settings_version:
+            return None
+        self.settings_version = self.settings_store.version
+        return self.apply_settings(self.settings_store.current())
+    
+    def setup_prayer_schedule(self, locations, offsets, method='MWL', asr='Standard'):
+        """Setup posting relative to each location's own prayer times
+
+        locations: dicts with 'latitude', 'longitude' and 'targets'
+        offsets: minutes after each prayer to post, e.g. {'fajr': 20}
+        """
+        self.prayer_locations = list(locations)
+        self.prayer_offsets = dict(offsets)
+        self.prayer_method = method
+        self.prayer_asr = asr
+        self.prayer_table = None
+
+        schedule.clear('prayer-refresh')
+        schedule.every().day.at("00:00").do(self._schedule_prayer_posts).tag('prayer-refresh')
+        self._schedule_prayer_posts()
+
+    def _ensure_prayer_table(self, today):
+        """Compute a year's prayer table, padded a day on each side"""
+        table = self.prayer_table
+        if table is not None:
+            try:
+                table.day_index(today - timedelta(days=1))
+                table.day_index(today + timedelta(days=1))
+                return table
+            except KeyError:
+                pass
+
+        start = date(today.year, 1, 1) - timedelta(days=1)
+        days = (date(today.year + 1, 1, 1) - start).days + 1
+        self.prayer_table = compute_table(
+            self.prayer_locations, start, days,
+            method=self.prayer_method, asr=self.prayer_asr
+        )
+        return self.prayer_table
+
+    def _schedule_prayer_posts(self):
+        """Register today's prayer-relative posts as one-off jobs
+
+        Targets posting at the same local minute share a single job.
+        """
+        schedule.clear('prayer')
+        if not self.prayer_locations:
+            return
+
+        now = datetime.now().astimezone()
+        today = now.date()
+        table = self._ensure_prayer_table(today)
+        utc_offset = now.utcoffset().total_seconds() / 60
+        today_number = today.toordinal()
+        now_minute = now.hour * 60 + now.minute
+
+        slots = defaultdict(list)
+        for day in (today - timedelta(days=1), today, today + timedelta(days=1)):
+            row = table.day_index(day)
+            for prayer, offset in self.prayer_offsets.items():
+                # Local minutes since 0001-01-01 for every location at once
+                hours = table.times[prayer][row].astype(np.float64)
+                local = np.round(day.toordinal() * 1440 + hours * 60 + offset + utc_offset)
+                local_day, minute = np.divmod(local, 1440)
+                due = (local_day == today_number) & (minute > now_minute)
+                for index in np.flatnonzero(due):
+                    slots[int(minute[index])].extend(self.prayer_locations[index]['targets'])
+
+        for minute, targets in sorted(slots.items()):
+            post_time = f"{minute // 60:02d}:{minute % 60:02d}"
+            schedule.every().day.at(post_time).do(
+                self._post_prayer_slot,
+                post_time=post_time,
+                targets=targets
+            ).tag('prayer')
+        logging.info(f"Scheduled {len(slots)} prayer-time posts for {today}")
+
+    def _post_prayer_slot(self, post_time, targets):
+        """Post once for a prayer-time slot"""
+        self._post_slot(f"{date.today().isoformat()}T{post_time}-prayer", targets)
+        return schedule.CancelJob
+
     def run_schedule(self):
         """Run the schedule in a loop"""
         while self.is_running:
-            schedule.run_pending()
+            try:
+                self.reload_settings()
+                schedule.run_pending()
+            except Exception as e:
+                logging.error(f"Error running scheduled jobs: {str(e)}")
             time.sleep(60)  # Check every minute
     
     def start(self, targets=None, posting_times=None):
@@ -78,15 +301,38 @@ class IslamicScheduler:
         
         # Import config here to avoid circular import
         from config import WHATSAPP_GROUPS, WHATSAPP_CHANNELS, POSTING_TIMES
+        from config import (PRAYER_SCHEDULING, PRAYER_LOCATIONS, PRAYER_POST_OFFSETS,
+                            PRAYER_CALCULATION_METHOD, PRAYER_ASR_METHOD)
+        
+        if self.settings_store is not None:
+            self.settings_store.poll()
+            self.settings_version = self.settings_store.version
+            settings = self.settings_store.current()
+        else:
+            settings = {
+                'groups': WHATSAPP_GROUPS,
+                'channels': WHATSAPP_CHANNELS,
+                'posting_times': POSTING_TIMES
+            }
         
         if targets is None:
-            targets = WHATSAPP_GROUPS + WHATSAPP_CHANNELS
+            targets = settings['groups'] + settings['channels']
         
         if posting_times is None:
-            posting_times = POSTING_TIMES
+            posting_times = settings['posting_times']
         
         self.setup_schedule(targets, posting_times)
         
+        if PRAYER_SCHEDULING and PRAYER_LOCATIONS:
+            self.setup_prayer_schedule(
+                PRAYER_LOCATIONS, PRAYER_POST_OFFSETS,
+                method=PRAYER_CALCULATION_METHOD, asr=PRAYER_ASR_METHOD
+            )
+        
+        if self.cluster is not None:
+            self.cluster.start()
+            schedule.every().minute.do(self._recover_cluster_slots).tag('cluster')
+        
         self.is_running = True
         self.thread = threading.Thread(target=self.run_schedule, daemon=True)
         self.thread.start()
@@ -102,6 +348,8 @@ class IslamicScheduler:
         self.is_running = False
         if self.thread:
             self.thread.join(timeout=5)
+        if self.cluster is not None:
+            self.cluster.stop()
         schedule.clear()
         logging.info("Scheduler stopped")
         print("\n❌ Scheduler stopped\n")
@@ -0,0 +1,118 @@
+"""Runtime Settings Store
+
+Targets and posting times that can change while the scheduler is running.
+Settings live in a JSON file that is watched for changes. Defaults come from
+config.py.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+SETTINGS_KEYS = ('groups', 'channels', 'posting_times')
+
+_TIME_RE = re.compile(r'^([01]\d|2[0-3]):[0-5]\d$')
+
+
+def validate_settings(settings):
+    """Check settings values, returning a normalized copy"""
+    normalized = {}
+    for key in SETTINGS_KEYS:
+        values = settings.get(key, [])
+        if not isinstance(values, (list, tuple)):
+            raise ValueError(f"'{key}' must be a list")
+        # Strip blanks and duplicates, keep order
+        normalized[key] = list(dict.fromkeys(str(v).strip() for v in values if str(v).strip()))
+
+    for post_time in normalized['posting_times']:
+        if not _TIME_RE.match(post_time):
+            raise ValueError(f"Invalid posting time (use HH:MM): {post_time}")
+    for channel in normalized['channels']:
+        if not channel.endswith('@newsletter'):
+            raise ValueError(f"Channel IDs must end with @newsletter: {channel}")
+    return normalized
+
+
+def diff_settings(old, new):
+    """Changes needed to go from old settings to new settings"""
+    old_targets = old['groups'] + old['channels']
+    new_targets = new['groups'] + new['channels']
+    return {
+        'added_times': [t for t in new['posting_times'] if t not in old['posting_times']],
+        'removed_times': [t for t in old['posting_times'] if t not in new['posting_times']],
+        'added_targets': [t for t in new_targets if t not in old_targets],
+        'removed_targets': [t for t in old_targets if t not in new_targets],
+    }
+
+
+class SettingsStore:
+    """JSON-file backed settings, watched by modification time"""
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = validate_settings(defaults)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._settings = self.defaults
+        self.version = 0
+        self.poll()
+
+    def current(self):
+        """Copy of the current settings"""
+        with self._lock:
+            return {key: list(values) for key, values in self._settings.items()}
+
+    def update(self, **changes):
+        """Validate, save and apply new settings values"""
+        unknown = set(changes) - set(SETTINGS_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {sorted(unknown)}")
+
+        with self._lock:
+            settings = validate_settings({**self._settings, **changes})
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(settings, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._settings = settings
+            self._mtime = os.stat(self.path).st_mtime_ns
+            self.version += 1
+
+        logging.info(f"Settings saved to {self.path}")
+        return self.current()
+
+    def poll(self):
+        """Reload the file if it changed on disk
+
+        Returns True if the settings changed. Every change, from disk or
+        through update(), also increments version.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("settings must be a JSON object")
+                settings = validate_settings({**self.defaults, **data})
+            except (OSError, ValueError) as e:
+                logging.error(f"Ignoring invalid settings file {self.path}: {str(e)}")
+                return False
+            if settings == self._settings:
+                return False
+            self._settings = settings
+            self.version += 1
+
+        logging.info(f"Settings reloaded from {self.path}")
+        return True
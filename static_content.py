@@ -0,0 +1,70 @@
+"""Static Islamic Content
+
+The 99 Names of Allah and the dua collection, loaded once from a packed data
+file into read-only tuples with a category index. Duas can carry extra tags
+besides their category; the index covers both.
+"""
+
+import json
+import logging
+import os
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+STATIC_CONTENT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'static_content.json'
+)
+
+AllahName = namedtuple('AllahName', ['arabic', 'english', 'meaning'])
+Dua = namedtuple('Dua', ['category', 'arabic', 'translation', 'reference', 'tags'])
+
+
+class StaticContent:
+    """Read-only view of the packed dataset"""
+
+    __slots__ = ('names', 'duas', 'dua_categories')
+
+    def __init__(self, names, duas):
+        self.names = names
+        self.duas = duas
+
+        # A dua is listed under its category and each of its tags
+        categories = {}
+        for dua in duas:
+            for category in dict.fromkeys((dua.category,) + dua.tags):
+                categories.setdefault(category, []).append(dua)
+        self.dua_categories = MappingProxyType(
+            {category: tuple(items) for category, items in categories.items()}
+        )
+
+
+@lru_cache(maxsize=None)
+def load_static_content(path=STATIC_CONTENT_FILE):
+    """Load the packed data file (once per path)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if tuple(data['name_fields']) != AllahName._fields:
+        raise ValueError(f"Unexpected name fields in {path}: {data['name_fields']}")
+    if tuple(data['dua_fields']) != Dua._fields:
+        raise ValueError(f"Unexpected dua fields in {path}: {data['dua_fields']}")
+
+    content = StaticContent(
+        names=tuple(AllahName._make(row) for row in data['names']),
+        duas=tuple(Dua._make(row[:-1] + [tuple(row[-1])]) for row in data['duas']),
+    )
+    logging.info(
+        f"Loaded {len(content.names)} names and {len(content.duas)} duas "
+        f"in {len(content.dua_categories)} categories"
+    )
+    return content
+
+
+if __name__ == "__main__":
+    # Test the dataset
+    content = load_static_content()
+    print(f"Names of Allah: {len(content.names)}")
+    print(f"Duas: {len(content.duas)}")
+    for category, duas in sorted(content.dua_categories.items()):
+        print(f"  {category}: {len(duas)}")
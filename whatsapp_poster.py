@@ -10,14 +10,17 @@ import logging
 from datetime import datetime, timedelta
 import requests
 
+from pacing import PacingController
+
 class WhatsAppPoster:
     """Post content to WhatsApp groups and channels"""
     
-    def __init__(self, wait_time=15):
+    def __init__(self, wait_time=15, pacer=None):
         self.wait_time = wait_time
         self.use_api = False  # Set to True if using API
         self.api_url = None
         self.api_token = None
+        self.pacer = pacer or PacingController()
         logging.info("WhatsApp Poster initialized")
     
     def configure_api(self, api_url, api_token):
@@ -28,14 +31,19 @@ class WhatsAppPoster:
         logging.info("API configured for channel posting")
     
     def send_to_group(self, group_id, message):
-        """Send message to WhatsApp group"""
+        """Send message to WhatsApp group
+        
+        The browser gives no delivery confirmation, so successful sends
+        never speed up pacing. Latency is measured from the scheduled send
+        minute, not including pywhatkit's wait for it.
+        """
+        # Calculate time 1 minute from now
+        now = datetime.now()
+        send_time = now + timedelta(minutes=1)
+        scheduled = send_time.replace(second=0, microsecond=0)
         try:
             logging.info(f"Sending to group: {group_id}")
             
-            # Calculate time 1 minute from now
-            now = datetime.now()
-            send_time = now + timedelta(minutes=1)
-            
             kit.sendwhatmsg_to_group(
                 group_id=group_id,
                 message=message,
@@ -49,13 +57,19 @@ class WhatsAppPoster:
             time.sleep(self.wait_time + 5)
             pyautogui.press('enter')
             
+            self.pacer.record('browser', self._latency_since(scheduled), success=True, confirmed=False)
             logging.info(f"Message sent to group: {group_id}")
             return True
         
         except Exception as e:
+            self.pacer.record('browser', self._latency_since(scheduled), success=False)
             logging.error(f"Error sending to group {group_id}: {str(e)}")
             return False
     
+    def _latency_since(self, scheduled):
+        """Seconds since a scheduled send time (0 if it has not passed)"""
+        return max(0.0, (datetime.now() - scheduled).total_seconds())
+    
     def send_to_channel(self, channel_id, message):
         """Send message to WhatsApp channel"""
         if self.use_api and self.api_url:
@@ -66,6 +80,7 @@ class WhatsAppPoster:
     
     def _send_via_api(self, channel_id, message):
         """Send via WhatsApp API (for channels)"""
+        started = time.monotonic()
         try:
             headers = {
                 'accept': 'application/json',
@@ -85,42 +100,75 @@ class WhatsAppPoster:
                 headers=headers
             )
             
+            latency = time.monotonic() - started
             if response.status_code == 200:
+                self.pacer.record('api', latency, success=True)
                 logging.info(f"Message sent via API to: {channel_id}")
                 return True
             else:
+                throttled = response.status_code == 429
+                retry_after = response.headers.get('Retry-After', '')
+                self.pacer.record(
+                    'api', latency, success=False, throttled=throttled,
+                    retry_after=float(retry_after) if retry_after.isdigit() else None
+                )
                 logging.error(f"API error: {response.text}")
                 return False
         
         except Exception as e:
+            self.pacer.record('api', time.monotonic() - started, success=False)
             logging.error(f"Error sending via API: {str(e)}")
             return False
     
-    def send_bulk(self, targets, message, delay=60):
-        """Send to multiple groups/channels with delay"""
+    def backend_for(self, target):
+        """Send backend used for a target"""
+        if target.endswith('@newsletter') and self.use_api and self.api_url:
+            return 'api'
+        return 'browser'
+    
+    def send_bulk(self, targets, message, delay=None, before_send=None, after_send=None):
+        """Send to multiple groups/channels with delay
+        
+        message may be a single string or a {target: message} dict.
+        Without a fixed delay, the pacing controller decides how long to
+        wait after each send. before_send(target) is called right before
+        each send and can return False to skip the target;
+        after_send(target, success) is called right after it.
+        """
         results = []
+        last_backend = None
         
         for target in targets:
+            # Wait between sends
+            if last_backend is not None:
+                wait = delay if delay is not None else self.pacer.next_delay(last_backend)
+                time.sleep(wait)
+                last_backend = None
+            
+            if before_send is not None and not before_send(target):
+                continue
+            
+            text = message[target] if isinstance(message, dict) else message
+            
             if target.endswith('@newsletter'):
                 # It's a channel
-                success = self.send_to_channel(target, message)
+                success = self.send_to_channel(target, text)
             else:
                 # It's a group
-                success = self.send_to_group(target, message)
+                success = self.send_to_group(target, text)
+            
+            if after_send is not None:
+                after_send(target, success)
             
             results.append({
                 'target': target,
                 'success': success,
                 'timestamp': datetime.now().isoformat()
             })
-            
-            # Wait between sends
-            if len(targets) > 1:
-                time.sleep(delay)
+            last_backend = self.backend_for(target)
         
         return results
 
-
 if __name__ == "__main__":
     # Test poster
     poster = WhatsAppPoster()